@@ -1,22 +1,20 @@
 from datetime import datetime, timedelta
 
-from sqlalchemy import text
+from sqlalchemy import insert, text
 
 from main import Session as SessionLocal
-from main import engine
 
 
 def fill_db():
-    with engine.connect() as conn:
+    # Вся заливка идет одной транзакцией: один COMMIT в конце блока
+    with SessionLocal() as s, s.begin():
         # Очистка таблиц (в правильном порядке из-за внешних ключей)
-        conn.execute(
+        s.execute(
             text(
                 "TRUNCATE order_compositions, orders, recipes, menu_items, ingredients, suppliers, employees, customers RESTART IDENTITY CASCADE"
             )
         )
-        conn.commit()
 
-    with SessionLocal() as s:
         # 1. Customers
         customers_data = [
             ("Иван Иванов", "+7 (900) 123-45-67", "ivan@example.com", "Gold", 10.0),
@@ -117,16 +115,19 @@ def fill_db():
             Supplier,
         )
 
-        for name, phone, email, level, discount in customers_data:
-            s.add(
-                Customer(
-                    name=name,
-                    phone=phone,
-                    email=email,
-                    loyalty_level=level,
-                    discount_percent=discount,
-                )
-            )
+        customer_ids = s.scalars(
+            insert(Customer).returning(Customer.id, sort_by_parameter_order=True),
+            [
+                {
+                    "name": name,
+                    "phone": phone,
+                    "email": email,
+                    "loyalty_level": level,
+                    "discount_percent": discount,
+                }
+                for name, phone, email, level, discount in customers_data
+            ],
+        ).all()
 
         # 2. Employees
         employees_data = [
@@ -151,8 +152,13 @@ def fill_db():
             ("Григорий Повар 3", "Повар", "+7 (999) 222-00-11", 60000.0),
             ("Антонина Официантова 3", "Официант", "+7 (999) 222-00-22", 40000.0),
         ]
-        for fio, role, phone, salary in employees_data:
-            s.add(Employee(fio=fio, role=role, phone=phone, salary=salary))
+        employee_ids = s.scalars(
+            insert(Employee).returning(Employee.id, sort_by_parameter_order=True),
+            [
+                {"fio": fio, "role": role, "phone": phone, "salary": salary}
+                for fio, role, phone, salary in employees_data
+            ],
+        ).all()
 
         # 3. Suppliers
         suppliers_data = [
@@ -277,15 +283,17 @@ def fill_db():
                 "Самара, ул. Складская, 50",
             ),
         ]
-        for name, phone, email, address in suppliers_data:
-            s.add(Supplier(name=name, phone=phone, email=email, address=address))
-
-        s.commit()
+        supplier_ids = s.scalars(
+            insert(Supplier).returning(Supplier.id, sort_by_parameter_order=True),
+            [
+                {"name": name, "phone": phone, "email": email, "address": address}
+                for name, phone, email, address in suppliers_data
+            ],
+        ).all()
 
         # 4. Ingredients
-        suppliers = s.query(Supplier).all()
-        # Создаем словарь для быстрого доступа к id по имени (если нужно) или просто берем по порядку
-        sup_dict = {sup.name: sup.id for sup in suppliers}
+        # id поставщиков уже известны из RETURNING, повторно читать таблицу не нужно
+        sup_dict = {sup[0]: sup_id for sup, sup_id in zip(suppliers_data, supplier_ids)}
 
         ingredients_data = [
             ("Зерно Арабика", "кг", 50.0, 5.0, 1200.0, "Кофейный Мир"),
@@ -311,17 +319,20 @@ def fill_db():
             ("Лимоны", "кг", 5.0, 1.0, 200.0, "Фруктовый Сад"),
             ("Перец болгарский", "кг", 7.0, 1.5, 250.0, "Овощная База"),
         ]
-        for name, unit, stock, min_stock, price, sup_name in ingredients_data:
-            s.add(
-                Ingredient(
-                    name=name,
-                    unit=unit,
-                    stock_quantity=stock,
-                    min_stock_level=min_stock,
-                    purchase_price=price,
-                    supplier_id=sup_dict[sup_name],
-                )
-            )
+        ingredient_ids = s.scalars(
+            insert(Ingredient).returning(Ingredient.id, sort_by_parameter_order=True),
+            [
+                {
+                    "name": name,
+                    "unit": unit,
+                    "stock_quantity": stock,
+                    "min_stock_level": min_stock,
+                    "purchase_price": price,
+                    "supplier_id": sup_dict[sup_name],
+                }
+                for name, unit, stock, min_stock, price, sup_name in ingredients_data
+            ],
+        ).all()
 
         # 5. Menu Items
         menu_items_data = [
@@ -348,18 +359,26 @@ def fill_db():
             ("Лимонад Домашний", "Напиток", 250.0, "500 мл"),
             ("Свежевыжатый Апельсиновый", "Напиток", 300.0, "300 мл"),
         ]
-        for name, type, price, vol in menu_items_data:
-            s.add(
-                MenuItem(
-                    name=name, type=type, selling_price=price, volume_or_weight=vol
-                )
-            )
-
-        s.commit()
+        menu_item_ids = s.scalars(
+            insert(MenuItem).returning(MenuItem.id, sort_by_parameter_order=True),
+            [
+                {
+                    "name": name,
+                    "type": type,
+                    "selling_price": price,
+                    "volume_or_weight": vol,
+                }
+                for name, type, price, vol in menu_items_data
+            ],
+        ).all()
 
         # 6. Recipes
-        ing_dict = {ing.name: ing.id for ing in s.query(Ingredient).all()}
-        menu_dict = {item.name: item.id for item in s.query(MenuItem).all()}
+        ing_dict = {
+            ing[0]: ing_id for ing, ing_id in zip(ingredients_data, ingredient_ids)
+        }
+        menu_dict = {
+            item[0]: item_id for item, item_id in zip(menu_items_data, menu_item_ids)
+        }
 
         recipes_data = [
             ("Капучино", "Зерно Арабика", 0.02, "кг"),
@@ -405,61 +424,89 @@ def fill_db():
             ("Лимонад Домашний", "Сахар", 0.02, "кг"),
             ("Свежевыжатый Апельсиновый", "Апельсины", 0.3, "кг"),
         ]
-        for m_name, i_name, qty, unit in recipes_data:
-            s.add(
-                Recipe(
-                    menu_item_id=menu_dict[m_name],
-                    ingredient_id=ing_dict[i_name],
-                    quantity_required=qty,
-                    unit=unit,
-                )
-            )
-
-        s.commit()
+        s.execute(
+            insert(Recipe),
+            [
+                {
+                    "menu_item_id": menu_dict[m_name],
+                    "ingredient_id": ing_dict[i_name],
+                    "quantity_required": qty,
+                    "unit": unit,
+                }
+                for m_name, i_name, qty, unit in recipes_data
+            ],
+        )
 
         # 7. Orders
-        customers = s.query(Customer).all()
-        employees = s.query(Employee).all()
-        menu_items = s.query(MenuItem).all()
+        # внешние ключи берем из уже полученных id, без SELECT по таблицам
+        menu_items = [
+            (item_id, item[2]) for item, item_id in zip(menu_items_data, menu_item_ids)
+        ]
 
         import random
 
         random.seed(42)
 
-        for i in range(20):
-            cust = random.choice(customers + [None])
-            emp = random.choice(employees)
-            o_type = random.choice(["В заведении", "С собой"])
-            p_method = random.choice(["Карта", "Наличные", "QR-код"])
-            status = random.choice(["Новый", "В работе", "Готов", "Оплачен"])
+        orders_count = 20
+        # категориальные поля выбираем сразу для всех заказов одним вызовом
+        picks = zip(
+            random.choices(customer_ids + [None], k=orders_count),
+            random.choices(employee_ids, k=orders_count),
+            random.choices(["В заведении", "С собой"], k=orders_count),
+            random.choices(["Карта", "Наличные", "QR-код"], k=orders_count),
+            random.choices(["Новый", "В работе", "Готов", "Оплачен"], k=orders_count),
+        )
 
-            order = Order(
-                customer_id=cust.id if cust else None,
-                employee_id=emp.id,
-                order_type=o_type,
-                payment_method=p_method,
-                status=status,
-                order_date=datetime.now()
-                - timedelta(days=random.randint(0, 30), hours=random.randint(0, 12)),
+        orders_data = []
+        compositions_data = []
+        for i, (cust_id, emp_id, o_type, p_method, status) in enumerate(picks):
+            orders_data.append(
+                {
+                    "customer_id": cust_id,
+                    "employee_id": emp_id,
+                    "order_type": o_type,
+                    "payment_method": p_method,
+                    "status": status,
+                    "order_date": datetime.now()
+                    - timedelta(
+                        days=random.randint(0, 30), hours=random.randint(0, 12)
+                    ),
+                }
             )
-            s.add(order)
-            s.flush()
 
             # 8. Order Composition
             # Добавляем 1-3 позиции в каждый заказ
             for _ in range(random.randint(1, 3)):
-                item = random.choice(menu_items)
+                item_id, price = random.choice(menu_items)
                 qty = random.randint(1, 2)
-                s.add(
-                    OrderComposition(
-                        order_id=order.id,
-                        menu_item_id=item.id,
-                        quantity=qty,
-                        price_at_sale=item.selling_price,
-                    )
+                compositions_data.append(
+                    {
+                        "order_index": i,
+                        "menu_item_id": item_id,
+                        "quantity": qty,
+                        "price_at_sale": price,
+                    }
                 )
 
-        s.commit()
+        # id заказов получаем одним запросом через RETURNING, без flush на каждый заказ
+        order_ids = s.scalars(
+            insert(Order).returning(Order.id, sort_by_parameter_order=True),
+            orders_data,
+        ).all()
+
+        s.execute(
+            insert(OrderComposition),
+            [
+                {
+                    "order_id": order_ids[c["order_index"]],
+                    "menu_item_id": c["menu_item_id"],
+                    "quantity": c["quantity"],
+                    "price_at_sale": c["price_at_sale"],
+                }
+                for c in compositions_data
+            ],
+        )
+
     print("База данных успешно заполнена тематическими данными!")
 
 
@@ -13,7 +13,7 @@ class Customer(Base):
     discount_percent: Mapped[float] = mapped_column(default=0.0)
 
     orders: Mapped[list["Order"]] = relationship(
-        back_populates="customer", cascade="all, delete"
+        back_populates="customer", cascade="all, delete", passive_deletes=True
     )
 
 
@@ -23,7 +23,7 @@ class Employee(Base):
     role: Mapped[str]
     phone: Mapped[str]
     hire_date: Mapped[datetime] = mapped_column(default=datetime.now)
-    salary: Mapped[float] = mapped_column(Numeric(10, 2))
+    salary: Mapped[float] = mapped_column(Numeric(10, 2, asdecimal=False))
 
     orders: Mapped[list["Order"]] = relationship(back_populates="employee")
 
@@ -35,17 +35,35 @@ trigger_dml_2_func = """
 CREATE OR REPLACE FUNCTION notify_customer_update()
 RETURNS TRIGGER AS $$
 BEGIN
-    RAISE NOTICE 'Данные клиента обновлены: ID %', NEW.name;
-    RETURN NEW;
+    INSERT INTO trigger_logs (
+        trigger_name,
+        action,
+        entity,
+        entity_id,
+        message,
+        created_at
+    )
+    SELECT
+        'trg_notify_customer_update',
+        'UPDATE',
+        'customers',
+        id,
+        'Обновлены данные клиента: ' || name,
+        NOW()
+    FROM new_rows;
+
+    RETURN NULL;
 END;
 $$ LANGUAGE plpgsql;
+
 """
 
 trigger_dml_2 = """
 DROP TRIGGER IF EXISTS trg_notify_customer_update ON customers;
 CREATE TRIGGER trg_notify_customer_update
 AFTER UPDATE ON customers
-FOR EACH ROW EXECUTE FUNCTION notify_customer_update();
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION notify_customer_update();
 """
 
 # 3. DML Trigger: Логирование удаления блюда из меню
@@ -53,29 +71,55 @@ trigger_dml_3_func = """
 CREATE OR REPLACE FUNCTION notify_menu_item_deletion()
 RETURNS TRIGGER AS $$
 BEGIN
-    RAISE NOTICE 'Блюдо удалено из меню: ID %, Название: %', OLD.id, OLD.name;
-    RETURN OLD;
+    INSERT INTO trigger_logs (
+        trigger_name,
+        action,
+        entity,
+        entity_id,
+        message,
+        created_at
+    )
+    SELECT
+        'trg_notify_menu_item_deletion',
+        'DELETE',
+        'menu_items',
+        id,
+        'Удалено блюдо из меню: ' || name,
+        NOW()
+    FROM old_rows;
+
+    RETURN NULL;
 END;
 $$ LANGUAGE plpgsql;
+
 """
 
 trigger_dml_3 = """
 DROP TRIGGER IF EXISTS trg_notify_menu_item_deletion ON menu_items;
 CREATE TRIGGER trg_notify_menu_item_deletion
 AFTER DELETE ON menu_items
-FOR EACH ROW EXECUTE FUNCTION notify_menu_item_deletion();
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT EXECUTE FUNCTION notify_menu_item_deletion();
 """
 
 # подключение триггеров
+# Весь DDL триггеров уходит в базу одним сообщением, а не запросом на каждую
+# функцию и триггер
+trigger_ddl_script = "\n".join(
+    (
+        trigger_dml_1_func,
+        trigger_dml_1,
+        trigger_dml_2_func,
+        trigger_dml_2,
+        trigger_dml_3_func,
+        trigger_dml_3,
+        trigger_ddl_func,
+    )
+)
+
 with engine.connect() as conn:
     print("Creating triggers...")
-    conn.execute(text(trigger_dml_1_func))
-    conn.execute(text(trigger_dml_1))
-    conn.execute(text(trigger_dml_2_func))
-    conn.execute(text(trigger_dml_2))
-    conn.execute(text(trigger_dml_3_func))
-    conn.execute(text(trigger_dml_3))
-    conn.execute(text(trigger_ddl_func))
+    conn.exec_driver_sql(trigger_ddl_script)
     conn.commit()
     print("Triggers created.")
 
@@ -83,13 +127,97 @@ with engine.connect() as conn:
 
 
 # "помощники" в интерфейсе
+# что сейчас показано в каждой таблице: tree -> {iid: values}
+tree_rows = {}
+# номер последней перезагрузки таблицы: устаревшие порции строк не вставляются
+tree_reloads = {}
+# строки, удаленные на месте: ни уже запланированные порции, ни выборки,
+# запущенные до удаления, их не возвращают. id из последовательности
+# повторно не выдаются, поэтому множество не сбрасывается
+tree_deleted = {}
+# сколько строк вставлять за один проход цикла событий Tk
+tree_chunk_size = 500
+# сколько последних записей trigger_logs показывать
+logs_limit = 1000
+
+# Tcl-процедура, которая вставляет/обновляет пачку строк за один вызов из Python
+# rows - плоский список: iid, позиция, values, iid, позиция, values, ...
+fill_tree_proc = """
+proc ::fill_tree {w rows} {
+    foreach {iid index values} $rows {
+        if {[$w exists $iid]} {
+            $w item $iid -values $values
+        } else {
+            $w insert {} $index -id $iid -values $values
+        }
+    }
+}
+"""
+
+
 def reload_tree(tree, rows):
-    tree.delete(*tree.get_children())
+    # iid строки = ее id (первая колонка), поэтому можно трогать только
+    # удаленные, новые и изменившиеся строки, а не пересобирать таблицу целиком
+    # строки сравниваются с показанными по мере чтения: целиком выборка не
+    # копируется, запоминаются только id и изменившиеся строки
+    shown = tree_rows.setdefault(tree, {})
+    deleted = tree_deleted.setdefault(tree, set())
+    seen = set()
+    changed = []
+    index = 0
     for r in rows:
-        tree.insert("", "end", values=[str(v) if v is not None else "" for v in r])
+        iid = str(r[0])
+        if iid in deleted:
+            continue
+        # values Tk приводит к строке сам, заменяем только None
+        values = tuple("" if v is None else v for v in r)
+        seen.add(iid)
+        if shown.get(iid) != values:
+            changed.append((iid, index, values))
+        index += 1
+
+    stale = [iid for iid in shown if iid not in seen]
+    if stale:
+        tree.delete(*stale)
+        for iid in stale:
+            del shown[iid]
+
+    reload_id = tree_reloads.get(tree, 0) + 1
+    tree_reloads[tree] = reload_id
+    fill_tree_chunk(tree, changed, 0, reload_id)
+
+
+def fill_tree_chunk(tree, changed, start, reload_id):
+    # первая порция вставляется сразу, остальные - когда Tk свободен,
+    # чтобы большая таблица не замораживала окно
+    if tree_reloads[tree] != reload_id:
+        return
+
+    chunk = changed[start : start + tree_chunk_size]
+    if not chunk:
+        return
+
+    deleted = tree_deleted[tree]
+    if deleted:
+        chunk = [row for row in chunk if row[0] not in deleted]
+
+    if chunk:
+        flat = []
+        for row in chunk:
+            flat.extend(row)
+        tree.tk.call("::fill_tree", tree._w, flat)
 
+        shown = tree_rows[tree]
+        for iid, _, values in chunk:
+            shown[iid] = values
 
-def delete_selected(tree, model, reload_func):
+    if start + tree_chunk_size < len(changed):
+        tree.after_idle(
+            fill_tree_chunk, tree, changed, start + tree_chunk_size, reload_id
+        )
+
+
+def delete_selected(tree, model, *reload_related):
     selected = tree.selection()
     if not selected:
         messagebox.showwarning("Внимание", "Выберите запись")
@@ -98,44 +226,88 @@ def delete_selected(tree, model, reload_func):
     if not messagebox.askyesno("Подтверждение", "Удалить выбранную запись?"):
         return
 
-    item = tree.item(selected[0])
-    record_id = int(item["values"][0])
+    # iid строки = ее id, values из Tk не перечитываются
+    ids = [int(iid) for iid in selected]
 
-    s = Session()
-    obj = s.get(model, record_id)
-    if obj:
-        s.delete(obj)
+    # один DELETE по всем выбранным id, без загрузки объектов;
+    # зависимые строки удаляются каскадом в самой БД
+    with Session() as s:
+        s.execute(delete(model).where(model.id.in_(ids)))
         s.commit()
-    s.close()
 
-    reload_func()
+    # удаленные строки убираются из таблицы на месте, без повторной выборки
+    tree_deleted.setdefault(tree, set()).update(selected)
+    tree.delete(*selected)
+    shown = tree_rows.get(tree, {})
+    for iid in selected:
+        shown.pop(iid, None)
+
+    # таблицы, в которых БД удалила или пересчитала строки каскадом,
+    # перечитываются
+    for reload_func in reload_related:
+        reload_func()
 
 
 #########################
 
 
 # загрузчики данных для таблиц в интерфейсе
+# запросы списков выполняются в фоновых потоках, чтобы медленный SELECT не
+# подвешивал окно; строки отдаются в reload_tree из главного потока Tk.
+# Сохранение в формах остается в главном потоке: это одна короткая транзакция
+# на несколько строк, а при ошибке окно должно остаться открытым с сообщением
+# (commit_edit_session), поэтому результат нужен сразу
+loader_executor = ThreadPoolExecutor(max_workers=2)
+# номер последней выборки для каждой таблицы: ответ на более старый запрос
+# отбрасывается
+tree_fetches = {}
+
+
+def fetch_rows(query):
+    with engine.connect() as conn:
+        return conn.execute(query).all()
+
+
+def load_tree_async(tree, query):
+    fetch_id = tree_fetches.get(tree, 0) + 1
+    tree_fetches[tree] = fetch_id
+    future = loader_executor.submit(fetch_rows, query)
+
+    def apply_rows():
+        if not future.done():
+            tree.after(20, apply_rows)
+            return
+        if tree_fetches[tree] == fetch_id:
+            reload_tree(tree, future.result())
+
+    tree.after(20, apply_rows)
+
+
+customers_list_query = select(
+    Customer.id,
+    Customer.name,
+    Customer.phone,
+    Customer.email,
+    Customer.loyalty_level,
+    Customer.discount_percent,
+)
+
+
 def load_customers():
-    s = Session()
-    rows = s.query(
-        Customer.id,
-        Customer.name,
-        Customer.phone,
-        Customer.email,
-        Customer.loyalty_level,
-        Customer.discount_percent,
-    ).all()
-    s.close()
-    reload_tree(customers_tree, rows)
+    load_tree_async(customers_tree, customers_list_query)
+
+
+suppliers_list_query = select(
+    Supplier.id,
+    Supplier.name,
+    Supplier.phone,
+    Supplier.email,
+    Supplier.address,
+)
 
 
 def load_suppliers():
-    s = Session()
-    rows = s.query(
-        Supplier.id, Supplier.name, Supplier.phone, Supplier.email, Supplier.address
-    ).all()
-    s.close()
-    reload_tree(suppliers_tree, rows)
+    load_tree_async(suppliers_tree, suppliers_list_query)
 
 
 #########################
@@ -143,67 +315,101 @@ def load_suppliers():
 
 # формы для добавления/редактирования данных
 def report_all_orders():
-    s = Session()
-
-    rows = (
-        s.query(
-            Order.id,
-            Customer.name,
-            MenuItem.name,
-            OrderComposition.quantity,
-            OrderComposition.price_at_sale,
-            (OrderComposition.quantity * OrderComposition.price_at_sale).label("total"),
+    # генератор: строки отдаются порциями серверного курсора, весь отчет
+    # в памяти не собирается
+    with engine.connect() as conn:
+        yield from conn.execute(
+            select(
+                Order.id,
+                Customer.name,
+                MenuItem.name,
+                OrderComposition.quantity,
+                OrderComposition.price_at_sale,
+                OrderComposition.line_total.label("total"),
+            )
+            .outerjoin(Customer, Order.customer_id == Customer.id)
+            .join(OrderComposition, OrderComposition.order_id == Order.id)
+            .join(MenuItem, OrderComposition.menu_item_id == MenuItem.id),
+            execution_options={"stream_results": True, "yield_per": 1000},
         )
-        .outerjoin(Customer, Order.customer_id == Customer.id)
-        .join(OrderComposition, OrderComposition.order_id == Order.id)
-        .join(MenuItem, OrderComposition.menu_item_id == MenuItem.id)
-        .all()
-    )
-
-    s.close()
-    return rows
 
 
 #########################
 
 
 # формирование отчета
-def export_report():
-    s = Session()
-    wb = Workbook()
-
-    def bold(ws):
-        for c in ws[1]:
-            c.font = Font(bold=True)
-
-    ws = wb.active
-    ws.title = "Продажи по дням"
-    ws.append(["Дата", "Заказов", "Позиций", "Выручка"])
-
-    rows = s.execute(
-        text("""
-        SELECT
-            DATE(o.order_date) AS day,
-            COUNT(DISTINCT o.id) AS orders,
-            SUM(oc.quantity) AS items,
-            SUM(oc.quantity * oc.price_at_sale) AS revenue
-        FROM orders o
-        JOIN order_compositions oc ON oc.order_id = o.id
-        GROUP BY day
-        ORDER BY day
-    """)
-    ).all()
+def build_report(file):
+    executor = ThreadPoolExecutor(max_workers=len(report_queries))
+    futures = {
+        name: executor.submit(fetch_rows, query)
+        for name, query in report_queries.items()
+    }
+    executor.shutdown(wait=False)
 
-    for r in rows:
-        ws.append(tuple(r))
+    wb = Workbook(write_only=True)
+    header_font = Font(bold=True)
+
+    def header(ws, titles):
+        cells = []
+        for title in titles:
+            cell = WriteOnlyCell(ws, value=title)
+            cell.font = header_font
+            cells.append(cell)
+        ws.append(cells)
+
+    ws = wb.create_sheet("Продажи по дням")
+    header(ws, ["Дата", "Заказов", "Позиций", "Выручка"])
+
+    append_streamed_rows(ws, daily_sales_query)
+
+    results = {name: future.result() for name, future in futures.items()}
+
+
+def export_report():
+    file = asksaveasfilename(
+        defaultextension=".xlsx",
+        filetypes=[("Excel files", "*.xlsx")],
+        title="Сохранить отчет",
+    )
+    if not file:
+        return
 
-    bold(ws)
+    win = tk.Toplevel(root)
+    win.title("Отчет")
+    tk.Label(win, text="Формируется отчет...").pack(padx=20, pady=(10, 5))
+    progress = ttk.Progressbar(win, mode="indeterminate", length=250)
+    progress.pack(padx=20, pady=(0, 10))
+    progress.start()
+    # окно модальное и не закрывается, пока отчет не готов: второй экспорт
+    # не запустить, а результат не потеряется вместе с окном
+    win.protocol("WM_DELETE_WINDOW", lambda: None)
+    win.grab_set()
+
+    # отчет собирается в фоновом потоке, окно не подвисает; Tk трогает только
+    # главный поток, который опрашивает готовность
+    executor = ThreadPoolExecutor(max_workers=1)
+    future = executor.submit(build_report, file)
+    executor.shutdown(wait=False)
+
+    def poll():
+        if not future.done():
+            root.after(100, poll)
+            return
+        win.destroy()
+        error = future.exception()
+        if error is not None:
+            messagebox.showerror("Ошибка", f"Не удалось сохранить отчет: {error}")
+        else:
+            messagebox.showinfo("Готово", "Отчёт успешно сохранён!")
+
+    root.after(100, poll)
 
 
 #########################
 
 # отрисовка интерфейса
 root = tk.Tk()
+root.tk.eval(fill_tree_proc)
 root.title("Cafe Control")
 root.geometry("1280x720")
 
@@ -231,6 +437,8 @@ tk.Button(fc, text="Редактировать", command=lambda: edit_customer(c
 tk.Button(
     fc,
     text="Удалить",
-    command=lambda: delete_selected(customers_tree, Customer, load_customers),
+    command=lambda: delete_selected(
+        customers_tree, Customer, refresh_order_compositions
+    ),
 ).pack(side="left")
 load_customers()